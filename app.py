@@ -9,6 +9,8 @@ import sys
 from datetime import datetime
 import threading
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from srt import parse as srt_parse
 from deep_translator import GoogleTranslator
 import pysubs2
@@ -43,6 +45,7 @@ class AppState:
         self.arabic_srt_content = ""
         self.is_processing = False
         self.logs = []
+        self.pipeline = _idle_pipeline()
     
     def reset(self):
         self.step_status = [''] * 8
@@ -50,6 +53,13 @@ class AppState:
         self.arabic_srt_content = ""
         self.is_processing = False
         self.logs = []
+        self.pipeline = _idle_pipeline()
+
+
+def _idle_pipeline():
+    """Status object for a run-all pipeline that has not started"""
+    return {'state': 'idle', 'stages': {}, 'started_at': None, 'finished_at': None}
+
 
 app_state = AppState()
 
@@ -67,6 +77,7 @@ def get_status():
         'step_status': app_state.step_status,
         'is_processing': app_state.is_processing,
         'files': get_files_info(),
+        'pipeline': app_state.pipeline,
         'logs': app_state.logs[-50:]  # Last 50 log entries
     })
 
@@ -307,31 +318,58 @@ def _step_cut(start_time, end_time):
         app_state.step_status[1] = '✗'
 
 
-def _step_extract_german():
-    """Extract German subtitles using Whisper"""
+# Whisper (verbose mode) prints each cue as it is decoded: "[00:01.000 --> 00:04.500]  text"
+WHISPER_CUE_RE = re.compile(r'^\[[\d:.]+ --> [\d:.]+\]\s*(.*)$')
+
+
+def _extract_audio(source=None, start_seconds=None, duration=None):
+    """Extract audio to WAV (16kHz mono PCM), optionally from a segment of the source"""
+    if os.path.exists(Settings.AUDIO_WAV):
+        log(f"Audio already exists: {Settings.AUDIO_WAV}")
+        log("Delete the file if you want to re-extract with new times")
+        return True
+    
+    source = source or Settings.CUT_VIDEO
+    log(f"Extracting audio to WAV (16kHz mono PCM) from {source}...")
+    cmd = [Settings.FFMPEG, "-y", "-i", source]
+    if start_seconds is not None:
+        cmd += ["-ss", str(start_seconds), "-t", str(duration)]
+    cmd += [
+        "-vn", "-acodec", "pcm_s16le",
+        "-ar", "16000", "-ac", "1",
+        "-map_metadata", "0",
+        Settings.AUDIO_WAV
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if result.stdout:
+        for line in result.stdout.strip().split('\n'):
+            if line:
+                log(f"ffmpeg: {line}")
+    
+    if result.returncode != 0:
+        log(f"Audio extraction failed with code: {result.returncode}")
+        # Don't leave a partial WAV behind to be reused by the next run
+        if os.path.exists(Settings.AUDIO_WAV):
+            os.remove(Settings.AUDIO_WAV)
+        return False
+    
+    if os.path.exists(Settings.AUDIO_WAV):
+        wav_size = os.path.getsize(Settings.AUDIO_WAV)
+        log(f"WAV file created: {wav_size} bytes")
+        return True
+    return False
+
+
+def _step_extract_german(on_cue=None):
+    """
+    Extract German subtitles using Whisper.
+    If on_cue is given, it is called with the text of each cue as Whisper prints it.
+    """
     log("Extracting German subtitles with Whisper...")
     app_state.step_status[2] = '⏳'
     
     # Extract audio first to WAV for reliable Whisper processing
-    if not os.path.exists(Settings.AUDIO_WAV):
-        log("Extracting audio to WAV (16kHz mono PCM)...")
-        cmd = [
-            Settings.FFMPEG, "-y",
-            "-i", Settings.CUT_VIDEO,
-            "-vn", "-acodec", "pcm_s16le",
-            "-ar", "16000", "-ac", "1",
-            "-map_metadata", "0",
-            Settings.AUDIO_WAV
-        ]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        if result.stdout:
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    log(f"ffmpeg: {line}")
-        
-        if os.path.exists(Settings.AUDIO_WAV):
-            wav_size = os.path.getsize(Settings.AUDIO_WAV)
-            log(f"WAV file created: {wav_size} bytes")
+    _extract_audio()
     
     # Run Whisper
     audio_file = Settings.AUDIO_WAV if os.path.exists(Settings.AUDIO_WAV) else Settings.CUT_VIDEO
@@ -348,12 +386,23 @@ def _step_extract_german():
     ]
     
     log(f"Whisper command: {' '.join(cmd)}")
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    
-    if result.stdout:
-        for line in result.stdout.strip().split('\n')[:20]:
-            if line:
-                log(f"whisper: {line}")
+    # Stream output so cues are available while Whisper is still running
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    
+    logged = 0
+    for line in process.stdout:
+        line = line.strip()
+        if not line:
+            continue
+        if logged < 20:
+            log(f"whisper: {line}")
+            logged += 1
+        if on_cue:
+            match = WHISPER_CUE_RE.match(line)
+            if match and match.group(1).strip():
+                on_cue(match.group(1).strip())
+    process.wait()
     
     # Check for SRT file
     srt_locations = ["cut.srt", os.path.join(".", "cut.srt"), os.path.splitext(audio_file)[0] + ".srt"]
@@ -381,8 +430,11 @@ def _step_extract_german():
     app_state.step_status[2] = '✗'
 
 
-def _step_translate():
-    """Translate German to Arabic"""
+def _step_translate(prefetched=None):
+    """
+    Translate German to Arabic.
+    prefetched maps German cue text to futures already translating it.
+    """
     log("Translating to Arabic...")
     app_state.step_status[4] = '⏳'
     
@@ -396,7 +448,8 @@ def _step_translate():
     arabic_subtitles = []
     for sub in subs:
         german_text = sub.content
-        arabic = _translate_to_arabic(german_text)
+        future = (prefetched or {}).get(german_text.strip())
+        arabic = future.result() if future else _translate_to_arabic(german_text)
         arabic_subtitles.append({
             'start': sub.start,
             'end': sub.end,
@@ -424,21 +477,8 @@ def _translate_to_arabic(text):
         return text
 
 
-def _step_create_ass():
-    """Create ASS subtitle file"""
-    log("Creating ASS file...")
-    app_state.step_status[6] = '⏳'
-    
-    if not os.path.exists(Settings.SUBS_SRT_DE) or not os.path.exists(Settings.SUBS_SRT_AR):
-        log("German or Arabic SRT not found!")
-        return
-    
-    with open(Settings.SUBS_SRT_DE, "r", encoding="utf-8") as f:
-        german_subs = list(srt_parse(f.read()))
-    
-    with open(Settings.SUBS_SRT_AR, "r", encoding="utf-8") as f:
-        arabic_subs = list(srt_parse(f.read()))
-    
+def _new_ass_file():
+    """Create an empty ASS file with the German and Arabic styles"""
     ass = pysubs2.SSAFile()
     ass.styles["German"] = pysubs2.SSAStyle(
         fontname="Arial",
@@ -453,6 +493,26 @@ def _step_create_ass():
         primarycolor=pysubs2.Color(255, 255, 0, 0),
         marginv=40
     )
+    return ass
+
+
+def _step_create_ass(ass=None):
+    """Create ASS subtitle file (into ass, if a styled file was prepared already)"""
+    log("Creating ASS file...")
+    app_state.step_status[6] = '⏳'
+    
+    if not os.path.exists(Settings.SUBS_SRT_DE) or not os.path.exists(Settings.SUBS_SRT_AR):
+        log("German or Arabic SRT not found!")
+        return
+    
+    with open(Settings.SUBS_SRT_DE, "r", encoding="utf-8") as f:
+        german_subs = list(srt_parse(f.read()))
+    
+    with open(Settings.SUBS_SRT_AR, "r", encoding="utf-8") as f:
+        arabic_subs = list(srt_parse(f.read()))
+    
+    if ass is None:
+        ass = _new_ass_file()
     
     # Add German with karaoke
     for sub in german_subs:
@@ -516,6 +576,174 @@ def _step_produce_video():
     app_state.step_status[7] = '✓'
 
 
+# ================= Run-All Pipeline =================
+
+@app.route('/api/run_all', methods=['POST'])
+def run_all():
+    """Run the whole pipeline on the server"""
+    if app_state.is_processing:
+        return jsonify({'error': 'Processing already in progress'})
+    
+    data = request.json or {}
+    url = data.get('url', Settings.YOUTUBE_URL)
+    start_time = data.get('start_time', Settings.START_TIME)
+    end_time = data.get('end_time', Settings.END_TIME)
+    
+    log(f"API received - URL: {url}")
+    log(f"API received - Time: {start_time} --> {end_time}")
+    
+    app_state.is_processing = True
+    # Clear results of earlier runs so stages that don't run this time don't show as done
+    for _, _, _, step in PIPELINE_STAGES:
+        if step is not None:
+            app_state.step_status[step] = ''
+    app_state.pipeline = {
+        'state': 'running',
+        'stages': {name: 'pending' for name, _, _, _ in PIPELINE_STAGES},
+        'started_at': datetime.now().strftime("%H:%M:%S"),
+        'finished_at': None
+    }
+    thread = threading.Thread(target=_run_pipeline_thread, args=(app_state.pipeline, url, start_time, end_time))
+    thread.start()
+    
+    return jsonify({'message': 'Pipeline started', 'pipeline': app_state.pipeline})
+
+
+def _run_pipeline_thread(pipeline, url, start_time, end_time):
+    """Thread function for running the whole pipeline"""
+    translate_pool = ThreadPoolExecutor(max_workers=4)
+    ctx = {
+        'pipeline': pipeline,
+        'url': url,
+        'start_time': start_time,
+        'end_time': end_time,
+        'translate_pool': translate_pool,
+        'cue_translations': {},
+        'ass': None,
+    }
+    try:
+        log("Starting pipeline...")
+        _run_pipeline(ctx)
+    except Exception as e:
+        log(f"Error in pipeline: {str(e)}")
+    finally:
+        translate_pool.shutdown(wait=False, cancel_futures=True)
+        stages = pipeline['stages']
+        pipeline['state'] = 'done' if all(s == 'done' for s in stages.values()) else 'failed'
+        pipeline['finished_at'] = datetime.now().strftime("%H:%M:%S")
+        app_state.is_processing = False
+        log(f"Pipeline finished: {pipeline['state']}")
+
+
+def _run_pipeline(ctx):
+    """Run PIPELINE_STAGES as a dependency graph, starting each stage once its dependencies are done"""
+    stages = ctx['pipeline']['stages']
+    remaining = {name: (func, deps, step) for name, func, deps, step in PIPELINE_STAGES}
+    stage_steps = {name: step for name, _, _, step in PIPELINE_STAGES}
+    running = {}
+    
+    with ThreadPoolExecutor(max_workers=len(PIPELINE_STAGES)) as pool:
+        while True:
+            for name, (func, deps, _) in list(remaining.items()):
+                if all(stages[dep] == 'done' for dep in deps):
+                    del remaining[name]
+                    stages[name] = 'running'
+                    running[pool.submit(_run_stage, name, func, ctx)] = name
+            
+            if not running:
+                break
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stages[name] = 'done' if future.result() else 'failed'
+                step = stage_steps[name]
+                if stages[name] == 'failed' and step is not None:
+                    app_state.step_status[step] = '✗'
+    
+    # Whatever is left depends on a failed stage
+    for name, (_, _, step) in remaining.items():
+        stages[name] = 'skipped'
+        if step is not None:
+            app_state.step_status[step] = '✗'
+        log(f"Skipped stage: {name}")
+
+
+def _run_stage(name, func, ctx):
+    """Run one pipeline stage, returning True on success"""
+    log(f"Starting stage: {name}")
+    try:
+        return bool(func(ctx))
+    except Exception as e:
+        log(f"Error in stage {name}: {str(e)}")
+        return False
+
+
+def _stage_download(ctx):
+    _step_download(ctx['url'])
+    return app_state.step_status[0] == '✓'
+
+
+def _stage_cut(ctx):
+    _step_cut(ctx['start_time'], ctx['end_time'])
+    return app_state.step_status[1] == '✓'
+
+
+def _stage_audio(ctx):
+    """Extract the segment's audio straight from the source video, alongside the cut"""
+    start_seconds = _parse_time_to_seconds(ctx['start_time'])
+    end_seconds = _parse_time_to_seconds(ctx['end_time'])
+    if start_seconds is None or end_seconds is None or end_seconds <= start_seconds:
+        log("Error: Invalid cut times, cannot extract audio")
+        return False
+    return _extract_audio(Settings.VIDEO_NAME, start_seconds, end_seconds - start_seconds)
+
+
+def _stage_ass_styles(ctx):
+    ctx['ass'] = _new_ass_file()
+    return True
+
+
+def _stage_transcribe(ctx):
+    """Run Whisper, translating each cue as soon as it is printed"""
+    cues = ctx['cue_translations']
+    
+    def on_cue(text):
+        if text not in cues:
+            cues[text] = ctx['translate_pool'].submit(_translate_to_arabic, text)
+    
+    _step_extract_german(on_cue=on_cue)
+    return app_state.step_status[2] == '✓'
+
+
+def _stage_translate(ctx):
+    _step_translate(prefetched=ctx['cue_translations'])
+    return app_state.step_status[4] == '✓'
+
+
+def _stage_ass(ctx):
+    _step_create_ass(ass=ctx['ass'])
+    return app_state.step_status[6] == '✓'
+
+
+def _stage_produce(ctx):
+    _step_produce_video()
+    return app_state.step_status[7] == '✓'
+
+
+# (name, function, dependencies, step_status slot)
+PIPELINE_STAGES = [
+    ('download', _stage_download, [], 0),
+    ('cut', _stage_cut, ['download'], 1),
+    ('audio', _stage_audio, ['download'], None),
+    ('ass_styles', _stage_ass_styles, [], None),
+    ('transcribe', _stage_transcribe, ['audio'], 2),
+    ('translate', _stage_translate, ['transcribe'], 4),
+    ('ass', _stage_ass, ['translate', 'ass_styles'], 6),
+    ('produce', _stage_produce, ['cut', 'ass'], 7),
+]
+
+
 # ================= File Operations =================
 
 @app.route('/api/file/german', methods=['GET', 'POST'])
@@ -605,6 +833,9 @@ def get_files_info():
 @app.route('/api/clear', methods=['POST'])
 def clear_files():
     """Clear all generated files"""
+    if app_state.is_processing:
+        return jsonify({'error': 'Processing already in progress'})
+    
     files = [Settings.VIDEO_NAME, Settings.CUT_VIDEO, Settings.AUDIO_WAV,
             Settings.SUBS_SRT_DE, Settings.SUBS_SRT_AR, Settings.SUBS_ASS,
             Settings.FINAL_VIDEO]
@@ -613,6 +844,7 @@ def clear_files():
             os.remove(f)
     
     app_state.step_status = [''] * 8
+    app_state.pipeline = _idle_pipeline()
     app_state.logs = []
     log("Deleted all files")
     return jsonify({'message': 'All files deleted'})
@@ -150,8 +150,7 @@ async function runStep(stepNum) {
     await waitForProcessingComplete();
 }
 
-async function waitForProcessingComplete() {
-    const maxWaitTime = 300000; // 5 minutes max
+async function waitForProcessingComplete(maxWaitTime = 300000) { // 5 minutes max by default
     const pollInterval = 1000; // 1 second
     let waited = 0;
     
@@ -173,7 +172,7 @@ async function waitForProcessingComplete() {
             // Check if processing is complete
             if (!data.is_processing) {
                 hideProcessingModal();
-                return;
+                return data;
             }
         } catch (error) {
             console.error('Error polling status:', error);
@@ -186,14 +185,74 @@ async function waitForProcessingComplete() {
 }
 
 async function runAllSteps() {
+    // Get current settings from UI, use defaults if empty
+    const url = document.getElementById('youtube-url')?.value?.trim() || DEFAULT_YOUTUBE_URL;
+    const startTime = document.getElementById('start-time')?.value?.trim() || DEFAULT_START_TIME;
+    const endTime = document.getElementById('end-time')?.value?.trim() || DEFAULT_END_TIME;
+    
+    if (!validateTimes(startTime, endTime)) {
+        showToast('خطأ', 'وقت النهاية يجب أن يكون بعد وقت البداية');
+        return;
+    }
+    
     showToast('المعالجة', 'سيتم تشغيل جميع الخطوات تلقائياً...');
+    showProcessingModal();
+    
+    // The whole pipeline runs on the server; closing the page does not stop it
+    try {
+        const response = await fetch('/api/run_all', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                url: url,
+                start_time: startTime,
+                end_time: endTime
+            })
+        });
+        
+        const data = await response.json();
+        
+        if (data.error) {
+            showToast('خطأ', data.error);
+            hideProcessingModal();
+            return;
+        }
+    } catch (error) {
+        console.error('Error running pipeline:', error);
+        showToast('خطأ', 'حدث خطأ في الاتصال');
+        hideProcessingModal();
+        return;
+    }
     
-    // Run steps in order
-    for (let i = 0; i < 8; i++) {
-        if (i === 3 || i === 5) continue; // Skip edit steps
-        await runStep(i);
-        await new Promise(resolve => setTimeout(resolve, 1000)); // Wait 1 second between steps
+    const data = await waitForProcessingComplete(3600000); // 1 hour max for the whole pipeline
+    showPipelineResult(data?.pipeline);
+}
+
+function showPipelineResult(pipeline) {
+    if (!pipeline || pipeline.state === 'running') {
+        showToast('تنبيه', 'لا تزال المعالجة جارية على الخادم');
+        return;
     }
+    
+    if (pipeline.state === 'done') {
+        showToast('نجاح', 'تم تنفيذ جميع الخطوات بنجاح');
+        return;
+    }
+    
+    const stages = Object.entries(pipeline.stages || {});
+    const failed = stages.filter(([, state]) => state === 'failed').map(([name]) => name);
+    const skipped = stages.filter(([, state]) => state === 'skipped').map(([name]) => name);
+    
+    let message = 'فشلت المعالجة';
+    if (failed.length > 0) {
+        message += ` - فشل: ${failed.join(', ')}`;
+    }
+    if (skipped.length > 0) {
+        message += ` - تم تخطي: ${skipped.join(', ')}`;
+    }
+    showToast('خطأ', message);
 }
 
 // ================= Tab Navigation =================
@@ -516,6 +575,11 @@ async function clearFiles() {
         const response = await fetch('/api/clear', { method: 'POST' });
         const data = await response.json();
         
+        if (data.error) {
+            showToast('خطأ', data.error);
+            return;
+        }
+        
         showToast('نجاح', data.message);
         refreshAll();
         